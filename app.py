@@ -1,18 +1,20 @@
-from dotenv import load_dotenv
 import os
-from pathlib import Path
+import json
+import hashlib
+
+from config import load_env
 
 # Load .env from project root (robust on Windows/OneDrive/CWD changes)
-ROOT = Path(__file__).resolve().parent
-load_dotenv(dotenv_path=ROOT / ".env")
+load_env()
 
+import pandas as pd
 import streamlit as st
 import torch
 
 from backend.asr import ASRProcessor
 from backend.exports import ExportManager
 from backend.ai_tools import AITools
-from backend.utils import setup_directories, get_audio_duration
+from backend.utils import setup_directories, get_audio_duration, file_digest
 
 # Try to import diarization availability for better UX messages
 try:
@@ -54,17 +56,117 @@ def _fmt_secs(s: float) -> str:
     return f"{h:d}:{m:02d}:{sec:02d}" if h else f"{m:d}:{sec:02d}"
 
 
+def _digest(obj) -> str:
+    """Stable digest of JSON-like data, used as a cheap cache key."""
+    payload = json.dumps(obj, sort_keys=True, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _result_key(result: dict) -> str:
+    """Cache key of a transcription result, including speaker renames."""
+    return _digest({"text": result.get("text", ""), "segments": result.get("segments", [])})
+
+
+# ------------------------------
+# Process-wide singletons (survive reruns; keep HTTP keep-alive pools warm)
+# ------------------------------
+@st.cache_resource
+def _setup_directories() -> bool:
+    setup_directories()
+    return True
+
+
+@st.cache_resource
+def _asr(api_key: str) -> ASRProcessor:
+    return ASRProcessor(api_key=api_key)
+
+
+@st.cache_resource
+def _ai(api_key: str) -> AITools:
+    return AITools(api_key=api_key)
+
+
+@st.cache_resource
+def _exp() -> ExportManager:
+    return ExportManager()
+
+
+# ------------------------------
+# Cached builders (args starting with "_" are not hashed by Streamlit)
+# ------------------------------
+class _IncompleteTranscription(Exception):
+    """Raised out of _cached_transcribe so a partial result is shown but not cached."""
+
+    def __init__(self, message: str, result: dict):
+        super().__init__(message)
+        self.result = result
+
+
+def _incomplete_reason(result: dict) -> str:
+    meta = result.get("meta", {})
+    failed = meta.get("failed_chunks") or []
+    if failed:
+        return f"{len(failed)} chunk(s) failed to transcribe and are missing"
+    diar = meta.get("diarization", {})
+    if diar.get("requested") and diar.get("error"):
+        return f"speaker diarization failed: {diar['error']}"
+    return ""
+
+
+@st.cache_data(show_spinner=False, persist="disk", max_entries=50, ttl=7 * 24 * 60 * 60)
+def _cached_transcribe(file_hash: str, engine: str, enable_diar: bool, _asr_processor: ASRProcessor, _source) -> dict:
+    # Keyed on media content (not path/name), so re-uploads and redeploys hit the disk cache
+    result = _asr_processor.transcribe(_source, enable_diarization=enable_diar)
+    reason = _incomplete_reason(result)
+    if reason:
+        # Raise so a partial result (e.g. chunks lost to rate limits) is retried next time
+        raise _IncompleteTranscription(reason, result)
+    return result
+
+
+@st.cache_data(show_spinner=False)
+def _segments_frame(segments_key: str, _segments: list) -> pd.DataFrame:
+    return pd.DataFrame([
+        {
+            "start": f"{seg['start']:.1f}s",
+            "end": f"{seg['end']:.1f}s",
+            "speaker": seg.get("speaker") or "",
+            "text": seg.get("text", ""),
+        }
+        for seg in _segments
+    ])
+
+
+@st.cache_data(show_spinner=False, ttl=24 * 60 * 60)
+def _cached_exports(result_key: str, _export_manager: ExportManager, _result: dict):
+    """
+    Build SRT/VTT/DOCX/PDF concurrently (independent of each other).
+    Returns ({fmt: content}, {fmt: error message}) so one failure doesn't hide the rest.
+    """
+    errors = {}
+    outputs = _export_manager.export_bundle(_result, errors=errors)
+    return outputs, errors
+
+
+@st.cache_data(show_spinner=False, ttl=24 * 60 * 60)
+def _cached_ai_outputs(text: str, kinds: tuple, _ai_tools: AITools) -> dict:
+    outputs = _ai_tools.generate_all(text, kinds=kinds)
+    for value in outputs.values():
+        if value.startswith("Summary generation failed"):
+            # Raise so a transient API error is not cached for a day
+            raise RuntimeError(value.partition(": ")[2] or value)
+    return outputs
+
+
 def main():
     st.title("ScribeFlow — Speech to Structured Text")
     st.write("Upload audio/video for accurate transcription, optional speaker separation, and AI-powered analysis.")
 
     # Init folders and backends
-    setup_directories()
+    _setup_directories()
     _ensure_state()
 
-    asr_processor = ASRProcessor()
-    export_manager = ExportManager()
-    ai_tools = AITools()
+    export_manager = _exp()
 
     # ------------------------------
     # Sidebar: configuration
@@ -99,6 +201,10 @@ def main():
             st.warning("Please enter your OpenAI API Key")
             st.stop()
 
+    # Built after the sidebar so a key entered there is picked up (one instance per key)
+    asr_processor = _asr(api_key)
+    ai_tools = _ai(api_key)
+
     # ------------------------------
     # Inputs
     # ------------------------------
@@ -111,6 +217,7 @@ def main():
         help="Supported formats: MP3, MP4, WAV, M4A, AVI, MOV, FLAC, AAC, OGG"
     )
 
+    # Local path (YouTube download) or the upload stream itself, which is piped into ffmpeg
     file_path = None
     if youtube_url or uploaded_file is not None:
         if youtube_url:
@@ -123,25 +230,22 @@ def main():
                 st.error(f"YouTube download failed: {e}")
                 st.stop()
         else:
-            upload_dir = ROOT / "data" / "uploads"
-            upload_dir.mkdir(parents=True, exist_ok=True)
-            file_path = str(upload_dir / uploaded_file.name)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            file_path = uploaded_file
             st.success(f"Uploaded: {uploaded_file.name}")
 
-        # Pre-compute duration for status strip
-        try:
-            st.session_state.duration_sec = float(get_audio_duration(file_path))
-        except Exception:
-            st.session_state.duration_sec = 0.0
+        # Pre-compute duration for status strip (uploads get it from the transcription)
+        if isinstance(file_path, str):
+            try:
+                st.session_state.duration_sec = float(get_audio_duration(file_path))
+            except Exception:
+                st.session_state.duration_sec = 0.0
 
         # ------------------------------
         # Status strip (Model • Diarization • Device • Duration)
         # ------------------------------
         model_short = "4o-mini-tx"  # short for gpt-4o-mini-transcribe
         device_label = "cuda" if torch.cuda.is_available() else "cpu"
-        dur_str = _fmt_secs(st.session_state.duration_sec)
+        dur_str = _fmt_secs(st.session_state.duration_sec) if st.session_state.duration_sec else "—"
         st.markdown(
             f"**Model:** {model_short} | "
             f"**Diarization:** {'On' if enable_diar else 'Off'} | "
@@ -158,11 +262,24 @@ def main():
         # ------------------------------
         if st.button("Transcribe", type="primary"):
             try:
+                incomplete = False
                 with st.spinner("Transcribing..."):
-                    result = asr_processor.transcribe(file_path, enable_diarization=enable_diar)
+                    try:
+                        result = _cached_transcribe(
+                            file_digest(file_path),
+                            f"{asr_processor.backend}:{asr_processor.model}",
+                            enable_diar,
+                            asr_processor,
+                            file_path,
+                        )
+                    except _IncompleteTranscription as e:
+                        result = e.result
+                        incomplete = True
+                        st.warning(f"Transcript is incomplete ({e}); click Transcribe again to retry.")
 
                 st.session_state.transcription_result = result
                 st.session_state.show_results = True
+                st.session_state.duration_sec = float(result.get("meta", {}).get("duration") or 0.0)
 
                 if enable_diar:
                     speakers_meta = (
@@ -173,7 +290,8 @@ def main():
                     if speakers_meta:
                         st.info("Detected speakers: " + ", ".join(speakers_meta))
 
-                st.success("Transcription complete")
+                if not incomplete:
+                    st.success("Transcription complete")
             except Exception as e:
                 st.error(f"Transcription failed: {e}")
 
@@ -213,55 +331,52 @@ def main():
                     if spk in st.session_state.speaker_map:
                         seg["speaker"] = st.session_state.speaker_map[spk]
 
-            for seg in segments:
-                start_time = f"{seg['start']:.1f}s"
-                end_time = f"{seg['end']:.1f}s"
-                label = f"{seg.get('speaker')}: " if seg.get("speaker") else ""
-                st.write(f"[{start_time} - {end_time}] {label}{seg.get('text','')}")
+            # One table instead of one st.write (websocket message) per segment
+            segments_key = _digest({"segments": segments, "speakers": st.session_state.speaker_map})
+            st.dataframe(_segments_frame(segments_key, segments), use_container_width=True, hide_index=True)
 
         # Export Options
         st.header("Export Options")
         col1, col2, col3, col4 = st.columns(4)
+        result_key = _result_key(result)
+
+        exports, export_errors = _cached_exports(result_key, export_manager, result)
 
         with col1:
-            try:
-                srt_content = export_manager.to_srt(result)
-                st.download_button("Download SRT", srt_content, file_name="transcript.srt", mime="text/plain")
-            except Exception as e:
-                st.error(f"SRT export failed: {e}")
+            if "srt" in exports:
+                st.download_button("Download SRT", exports["srt"], file_name="transcript.srt", mime="text/plain")
+            else:
+                st.error(f"SRT export failed: {export_errors['srt']}")
 
         with col2:
-            try:
-                vtt_content = export_manager.to_vtt(result)
-                st.download_button("Download VTT", vtt_content, file_name="transcript.vtt", mime="text/vtt")
-            except Exception as e:
-                st.error(f"VTT export failed: {e}")
+            if "vtt" in exports:
+                st.download_button("Download VTT", exports["vtt"], file_name="transcript.vtt", mime="text/vtt")
+            else:
+                st.error(f"VTT export failed: {export_errors['vtt']}")
 
         with col3:
-            try:
-                docx_bytes = export_manager.to_docx(result)
+            if "docx" in exports:
                 st.download_button(
                     "Download DOCX",
-                    docx_bytes,
+                    exports["docx"],
                     file_name="transcript.docx",
                     mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
                 )
-            except Exception as e:
-                st.error(f"DOCX export failed: {e}")
+            else:
+                st.error(f"DOCX export failed: {export_errors['docx']}")
 
         with col4:
-            try:
-                pdf_bytes = export_manager.to_pdf(result)
-                st.download_button("Download PDF", pdf_bytes, file_name="transcript.pdf", mime="application/pdf")
-            except Exception as e:
-                st.error(f"PDF export failed: {e}")
+            if "pdf" in exports:
+                st.download_button("Download PDF", exports["pdf"], file_name="transcript.pdf", mime="application/pdf")
+            else:
+                st.error(f"PDF export failed: {export_errors['pdf']}")
 
         # AI Tools
         st.header("AI-Powered Analysis")
         if st.button("Generate Summary"):
             try:
                 with st.spinner("Generating summary..."):
-                    summary = ai_tools.generate_summary(result.get("text", ""))
+                    summary = _cached_ai_outputs(result.get("text", ""), ("summary",), ai_tools)["summary"]
                 st.text_area("Summary", summary, height=150)
             except Exception as e:
                 st.error(f"Summary generation failed: {e}")
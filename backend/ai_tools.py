@@ -1,12 +1,40 @@
 import os
-from typing import Optional
+import json
+from typing import Any, Dict, Optional, Sequence
 from openai import OpenAI
 from openai._exceptions import APIConnectionError, RateLimitError, APIStatusError
 
 
+# kind -> (instruction, max_tokens, temperature) for generate_all()
+_SECTIONS = {
+    "summary": ("a concise, factual summary of the content in ~5–7 bullet points", 500, 0.2),
+    "quiz": (
+        "5 short Q&A pairs from the content, formatted exactly as "
+        "'Q1: ...\\nA1: ...\\nQ2: ...\\nA2: ...' through Q5/A5",
+        400,
+        0.5,
+    ),
+    "email": (
+        "a short, professional email ({style} style) summarizing the key points, "
+        "clear and actionable, starting with a subject line",
+        300,
+        0.4,
+    ),
+}
+# Keys, quotes and escaped newlines of the JSON wrapper, on top of the section budgets
+_JSON_OVERHEAD_TOKENS = 100
+
+
+def _as_text(value: Any) -> str:
+    # Models occasionally return bullet lists as JSON arrays
+    if isinstance(value, list):
+        return "\n".join(str(v) for v in value)
+    return str(value)
+
+
 class AITools:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
+    def __init__(self, api_key: Optional[str] = None):
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OPENAI_API_KEY not set")
 
@@ -36,7 +64,17 @@ class AITools:
         # Simple character clamp to keep prompts small and predictable
         return text[:limit]
 
-    def _chat(self, system: str, user: str, max_tokens: int = 400, temperature: float = 0.3) -> str:
+    def _chat(
+        self,
+        system: str,
+        user: str,
+        max_tokens: int = 400,
+        temperature: float = 0.3,
+        response_format: Optional[Dict[str, str]] = None,
+    ) -> str:
+        extra: Dict[str, Any] = {}
+        if response_format:
+            extra["response_format"] = response_format
         try:
             resp = self.client.chat.completions.create(
                 model=self.model,
@@ -46,8 +84,13 @@ class AITools:
                 ],
                 max_tokens=max_tokens,
                 temperature=temperature,
+                **extra,
             )
-            return resp.choices[0].message.content
+            choice = resp.choices[0]
+            if response_format and choice.finish_reason == "length":
+                # Cut-off JSON can't be parsed; report it instead of returning half an object
+                return f"Summary generation failed: reply truncated at {max_tokens} tokens"
+            return choice.message.content
         except RateLimitError as e:
             return f"Summary generation failed: rate limit — {e}"
         except APIConnectionError as e:
@@ -58,48 +101,53 @@ class AITools:
             return f"Summary generation failed: {e}"
 
     def generate_summary(self, text: str) -> str:
-        content = self._safe_text(text)
-        return self._chat(
-            "You create concise, factual summaries.",
-            f"Summarize the following content in ~5–7 bullet points:\n\n{content}",
-            max_tokens=300,
-            temperature=0.2,
-        )
+        return self.generate_all(text, kinds=("summary",))["summary"]
 
     def generate_quiz(self, text: str) -> str:
-        content = self._safe_text(text)
-        try:
-            return self._chat(
-                "You write short quizzes with answers.",
-                (
-                    "Create 5 short Q&A pairs from this content. "
-                    "Format exactly as:\n"
-                    "Q1: ...\nA1: ...\n"
-                    "Q2: ...\nA2: ...\n"
-                    "Q3: ...\nA3: ...\n"
-                    "Q4: ...\nA4: ...\n"
-                    "Q5: ...\nA5: ...\n\n"
-                    f"Content:\n{content}"
-                ),
-                max_tokens=400,
-                temperature=0.5,
-            )
-        except Exception as e:
-            return f"Quiz generation failed: {e}"
+        return self.generate_all(text, kinds=("quiz",))["quiz"]
 
     def generate_email(self, text: str, email_type: Optional[str] = "summary") -> str:
+        return self.generate_all(text, kinds=("email",), email_type=email_type)["email"]
+
+    def generate_all(
+        self,
+        text: str,
+        kinds: Sequence[str] = ("summary", "quiz", "email"),
+        email_type: Optional[str] = "summary",
+    ) -> Dict[str, str]:
+        """
+        Produce several artifacts (summary/quiz/email) from one chat completion.
+        The model answers with a JSON object keyed by kind; on API failure every
+        requested kind gets the same error message.
+        """
+        unknown = [k for k in kinds if k not in _SECTIONS]
+        if unknown:
+            raise ValueError(f"Unknown AI output kind(s): {', '.join(unknown)}")
+
         content = self._safe_text(text)
+        style_hint = "summary" if (email_type or "summary") == "summary" else "general"
+        spec = "\n".join(
+            f'- "{k}": ' + _SECTIONS[k][0].format(style=style_hint) for k in kinds
+        )
+        raw = self._chat(
+            "You analyze transcripts and reply with a single JSON object of strings.",
+            f"Return a JSON object with exactly these keys:\n{spec}\n\nContent:\n{content}",
+            max_tokens=sum(_SECTIONS[k][1] for k in kinds) + _JSON_OVERHEAD_TOKENS,
+            temperature=min(_SECTIONS[k][2] for k in kinds),
+            response_format={"type": "json_object"},
+        )
+        if raw is None:
+            error = "Summary generation failed: empty reply"
+            return {k: error for k in kinds}
+        if raw.startswith("Summary generation failed"):
+            # _chat returns a readable error message instead of JSON on failure
+            return {k: raw for k in kinds}
         try:
-            style_hint = "summary" if (email_type or "summary") == "summary" else "general"
-            return self._chat(
-                "You write professional emails.",
-                (
-                    f"Draft a short, professional email ({style_hint} style) summarizing the key points below. "
-                    "Keep it clear and actionable, with a subject line.\n\n"
-                    f"{content}"
-                ),
-                max_tokens=300,
-                temperature=0.4,
-            )
-        except Exception as e:
-            return f"Email generation failed: {e}"
+            data = json.loads(raw)
+        except ValueError:
+            error = "Summary generation failed: reply was not valid JSON"
+            return {k: error for k in kinds}
+        if not isinstance(data, dict):
+            error = "Summary generation failed: reply was not a JSON object"
+            return {k: error for k in kinds}
+        return {k: _as_text(data.get(k, "")) for k in kinds}
@@ -1,14 +1,41 @@
 import os
 import re
 import io
-import tempfile
-from pathlib import Path
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+from typing import BinaryIO, List, Dict, Any, Iterable, Optional, Tuple, Union
 
-from openai import OpenAI
+import numpy as np
+from openai import OpenAI, AsyncOpenAI
 
-from .utils import extract_audio, get_audio_duration, slice_audio
+from .turns import build_turn_index, turns_to_array
+from .utils import (
+    extract_audio,
+    load_wav_np,
+    np_to_wav_bytes,
+    slice_audio_np,
+    slice_by_ranges,
+)
+
+# Faster event loop for the async chunk fan-out (optional; not available on Windows)
+try:
+    import uvloop
+    _LOOP_FACTORY = uvloop.new_event_loop
+except Exception:
+    _LOOP_FACTORY = None  # asyncio default loop
+
+# JIT for the turn-packing scan (optional; plain Python loop otherwise)
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+# Local faster-whisper backend (optional, ASR_BACKEND=faster_whisper)
+try:
+    from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+except Exception:
+    WhisperModel = None  # handled in _get_fw_pipeline()
+    BatchedInferencePipeline = None
+    decode_audio = None
 
 # Diarization imports with safe fallback
 try:
@@ -19,23 +46,101 @@ except Exception:
     def diarize(_):
         return []
 
+# VAD imports with safe fallback
+try:
+    from .vad import speech_ranges, is_speech, is_available as vad_available
+except Exception:
+    def vad_available() -> bool:
+        return False
+    def speech_ranges(_samples, sr=16000):
+        return []
+    def is_speech(_samples, sr=16000):
+        return True
+
+# Transcription models that can return segment timestamps (response_format="verbose_json")
+_TIMESTAMP_MODELS = {"whisper-1"}
+
+_SENT_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Largest segments x band overlap matrix built by _assign_speakers_vec
+_VEC_ASSIGN_MAX_CELLS = 1_000_000
+
+# The transcription API rejects clips shorter than 0.1 s ("Audio file is too short")
+_MIN_BATCH_S = 0.1
+
+
+def _pack_turns_kernel(starts, ends, spk, max_len, max_gap, out_s, out_e, out_k):
+    """
+    Array form of ASRProcessor._turns_to_batches over start-sorted SoA inputs.
+    Writes batches into the preallocated out_* arrays and returns their count.
+    """
+    k = 0
+    have = False
+    cs = 0.0
+    ce = 0.0
+    ck = -1
+    for i in range(starts.shape[0]):
+        s = starts[i]
+        lo = ce if have else 0.0
+        if s < lo:
+            s = lo
+        e = ends[i]
+        if e <= s:
+            continue
+        if have and spk[i] == ck and s - ce <= max_gap and e - cs <= max_len:
+            ce = e
+            continue
+        if have:
+            out_s[k] = cs
+            out_e[k] = ce
+            out_k[k] = ck
+            k += 1
+        cs = s
+        ce = e
+        ck = spk[i]
+        have = True
+        while ce - cs > max_len:
+            out_s[k] = cs
+            out_e[k] = cs + max_len
+            out_k[k] = ck
+            k += 1
+            cs += max_len
+    if have:
+        out_s[k] = cs
+        out_e[k] = ce
+        out_k[k] = ck
+        k += 1
+    return k
+
+
+if njit is not None:
+    _pack_turns_kernel = njit(cache=True)(_pack_turns_kernel)
+
 
 class ASRProcessor:
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
+    def __init__(self, api_key: Optional[str] = None):
+        api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY in your environment/.env.")
+        self.api_key = api_key
         self.client = OpenAI(api_key=api_key)
-        self.temp_files: List[str] = []
+        self.model = os.getenv("ASR_MODEL", "gpt-4o-mini-transcribe")
+        self.backend = os.getenv("ASR_BACKEND", "openai").lower()
+        self._fw_pipeline = None
 
-    def transcribe(self, file_path: str, enable_diarization: bool = False) -> dict:
+    def transcribe(self, file_path: Union[str, BinaryIO], enable_diarization: bool = False) -> dict:
         """
-        Transcribe audio/video file. If enable_diarization, run pyannote and map speakers to segments.
-        Uses chunked transcription for long files.
+        Transcribe an audio/video file path or readable binary stream (e.g. an upload). If enable_diarization, run pyannote and map speakers to segments.
+        Uses local batched faster-whisper when ASR_BACKEND=faster_whisper, otherwise
+        chunked OpenAI transcription (also the fallback if the local backend fails).
         """
+        # Per-call (not per-instance) so one processor can serve concurrent sessions
+        temp_files: List[str] = []
         try:
-            audio_path = self._prepare_audio(file_path)
-            duration = get_audio_duration(audio_path)
+            audio_path = self._prepare_audio(file_path, temp_files)
+            audio, sr = load_wav_np(audio_path)
+            # Exact and free once decoded (no ffprobe subprocess)
+            duration = len(audio) / float(sr) if sr else 0.0
             print(f"[asr] audio={audio_path} dur={duration:.2f}s")
 
             # Optional diarization first (on full wav)
@@ -51,56 +156,69 @@ class ASRProcessor:
                     except Exception as e:
                         print(f"[asr] diarization failed: {e}")
                         speaker_turns = []
+                        diar_meta["error"] = str(e) or type(e).__name__
                 else:
                     print("[asr] diarization requested but unavailable (missing token/package)")
+                    diar_meta["error"] = "pipeline unavailable (missing token/package)"
 
-            # Prepare 30s overlapping slices
-            slices = list(slice_audio(audio_path, window_s=30.0, overlap_s=0.3))
+            # Speech ranges (diarization turns, else a VAD pass) so silence is never sent
+            batches = self._speech_batches(audio, sr, speaker_turns)
+            ranges = [(b["start"], b["end"]) for b in batches]
+            print(f"[asr] speech batches={len(ranges)}")
 
-            aggregated_text_parts: List[str] = []
             merged_segments: List[Dict[str, Any]] = []
+            # (start_s, end_s) of chunks whose upload failed and were left out
+            failed_chunks: List[Tuple[float, float]] = []
+            if self.backend == "faster_whisper":
+                try:
+                    merged_segments = self._transcribe_local(audio_path, audio, sr, ranges)
+                except Exception as e:
+                    print(f"[asr] faster-whisper failed, falling back to OpenAI: {e}")
+                    merged_segments = []
 
-            max_workers = int(os.getenv("ASR_CONCURRENCY", "3"))
-            with ThreadPoolExecutor(max_workers=max_workers) as pool:
-                futures = {
-                    pool.submit(self._transcribe_bytes, wav_bytes): (start_s, end_s)
-                    for start_s, end_s, wav_bytes in slices
-                }
-                for fut in as_completed(futures):
-                    start_s, end_s = futures[fut]
-                    try:
-                        text = fut.result()
-                        aggregated_text_parts.append(text)
-                        merged_segments.append({"start": start_s, "end": end_s, "text": text})
-                    except Exception as e:
-                        print(f"[asr] chunk {start_s:.1f}-{end_s:.1f}s failed: {e}")
+            if not merged_segments:
+                if ranges:
+                    windows = slice_by_ranges(audio, sr, ranges)
+                else:
+                    # Prepare 30s overlapping slices
+                    windows = slice_audio_np(audio, sr, window_s=30.0, overlap_s=0.3)
+                # Ranges are speech already; fixed windows may be pure silence
+                merged_segments, failed_chunks = self._transcribe_chunks(windows, sr, skip_silence=not ranges)
 
-            merged_segments.sort(key=lambda s: s["start"])
-            full_text = " ".join(t for t in aggregated_text_parts).strip()
+            full_text = " ".join(s["text"] for s in merged_segments).strip()
 
             # Map segments to speaker turns (max overlap)
             if speaker_turns and merged_segments:
-                labeled = []
-                for seg in merged_segments:
-                    labeled.append({**seg, "speaker": self._assign_speaker(seg, speaker_turns)})
-                merged_segments = labeled
+                merged_segments = self._assign_speakers_vec(merged_segments, speaker_turns)
 
             # Fallback single-shot if chunk pass produced nothing
             if not full_text:
+                # Replaces the whole chunk pass, including any failed chunks
+                failed_chunks = []
                 with open(audio_path, "rb") as audio_file:
                     print("[asr] single-shot fallback → OpenAI")
-                    response = self.client.audio.transcriptions.create(
-                        model="gpt-4o-mini-transcribe",
-                        file=audio_file,
-                        response_format="text",
-                    )
-                full_text = str(response).strip()
-                merged_segments = self._create_sentence_segments(full_text, duration)
+                    if self.model in _TIMESTAMP_MODELS:
+                        response = self.client.audio.transcriptions.create(
+                            model=self.model,
+                            file=audio_file,
+                            response_format="verbose_json",
+                            timestamp_granularities=["segment"],
+                        )
+                        merged_segments = self._offset_segments(response, 0.0, duration)
+                        full_text = " ".join(s["text"] for s in merged_segments).strip()
+                    else:
+                        response = self.client.audio.transcriptions.create(
+                            model=self.model,
+                            file=audio_file,
+                            response_format="text",
+                        )
+                        full_text = str(response).strip()
+                        merged_segments = self._create_sentence_segments(full_text, duration)
 
             return {
                 "text": full_text,
                 "segments": merged_segments if merged_segments else self._create_sentence_segments(full_text, duration),
-                "meta": {"diarization": diar_meta},
+                "meta": {"diarization": diar_meta, "duration": duration, "failed_chunks": failed_chunks},
             }
 
         except Exception as e:
@@ -108,33 +226,302 @@ class ASRProcessor:
             traceback.print_exc()
             raise Exception(f"Transcription failed: {e}") from e
         finally:
-            self._cleanup_temp_files()
+            self._cleanup_temp_files(temp_files)
+
+    def _get_fw_pipeline(self):
+        """
+        Lazily build the faster-whisper batched pipeline (model load is expensive).
+        """
+        if self._fw_pipeline is not None:
+            return self._fw_pipeline
+        if BatchedInferencePipeline is None:
+            raise RuntimeError("faster-whisper is not installed. pip install faster-whisper")
+        model = WhisperModel(
+            os.getenv("FW_MODEL", "turbo"),
+            device="auto",
+            compute_type=os.getenv("FW_COMPUTE", "int8_float16"),
+        )
+        self._fw_pipeline = BatchedInferencePipeline(model)
+        return self._fw_pipeline
+
+    def _speech_batches(
+        self, audio: np.ndarray, sr: int, speaker_turns: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        if speaker_turns:
+            batches = self._turns_to_batches(speaker_turns)
+        elif os.getenv("ASR_VAD", "1") != "1" or not vad_available():
+            return []
+        else:
+            try:
+                ranges = speech_ranges(audio, sr)
+            except Exception as e:
+                print(f"[asr] VAD failed: {e}")
+                return []
+            # No speakers to keep apart: bridge pauses of any length while the batch
+            # fits max_len; a little silence costs far less than an extra upload
+            batches = self._turns_to_batches([{"start": s, "end": e} for s, e in ranges], max_gap=float("inf"))
+        # Slivers (tiny turns, split remainders) hold no words and would be rejected
+        return [b for b in batches if b["end"] - b["start"] >= _MIN_BATCH_S]
+
+    def _turns_to_batches(
+        self, turns: List[Dict[str, Any]], max_len: float = 28.0, max_gap: float = 0.5
+    ) -> List[Dict[str, Any]]:
+        """
+        Greedily pack adjacent same-speaker turns into <= max_len batches.
+        A speaker change or a gap > max_gap starts a new batch; overlapping
+        turns are clipped so no audio is transcribed twice.
+        """
+        if njit is not None and turns:
+            return self._turns_to_batches_jit(turns, max_len, max_gap)
+
+        # [start, end, speaker] lists are mutated in place; dicts only on return
+        rows = sorted(
+            ([float(t["start"]), float(t["end"]), t.get("speaker")] for t in turns),
+            key=lambda r: r[0],
+        )
+        out: List[list] = []
+        cur = None
+        for row in rows:
+            start, end, speaker = row
+            if cur is not None and start < cur[1]:
+                start = cur[1]
+            elif start < 0.0:
+                start = 0.0
+            if end <= start:
+                continue
+            if (
+                cur is not None
+                and speaker == cur[2]
+                and start - cur[1] <= max_gap
+                and end - cur[0] <= max_len
+            ):
+                cur[1] = end
+                continue
+            if cur is not None:
+                out.append(cur)
+            row[0] = start
+            # A single turn longer than max_len is split into max_len pieces
+            while end - row[0] > max_len:
+                out.append([row[0], row[0] + max_len, speaker])
+                row[0] += max_len
+            cur = row
+        if cur is not None:
+            out.append(cur)
+        return [{"start": s, "end": e, "speaker": k} for s, e, k in out]
+
+    def _turns_to_batches_jit(
+        self, turns: List[Dict[str, Any]], max_len: float, max_gap: float
+    ) -> List[Dict[str, Any]]:
+        arr, names = turns_to_array(turns)
+        arr = arr[np.argsort(arr["start"], kind="stable")]
+        starts = np.ascontiguousarray(arr["start"])
+        ends = np.ascontiguousarray(arr["end"])
+        spk = np.ascontiguousarray(arr["spk"])
+
+        # Clipping only shortens turns, so this bounds the number of max_len splits
+        cap = len(turns) + int(np.clip(ends - starts, 0.0, None).sum() // max_len) + 1
+        out_s = np.empty(cap, dtype=np.float64)
+        out_e = np.empty(cap, dtype=np.float64)
+        out_k = np.empty(cap, dtype=np.int64)
+        n = _pack_turns_kernel(starts, ends, spk, max_len, max_gap, out_s, out_e, out_k)
+
+        return [
+            {"start": float(s), "end": float(e), "speaker": names[k]}
+            for s, e, k in zip(out_s[:n], out_e[:n], out_k[:n])
+        ]
+
+    def _transcribe_local(
+        self, audio_path: str, audio: np.ndarray, sr: int, ranges: List[Tuple[float, float]]
+    ) -> List[Dict[str, Any]]:
+        pipeline = self._get_fw_pipeline()
+        if sr == 16000:
+            samples = audio.astype(np.float32) / 32768.0
+        else:
+            # Whisper expects 16k; let faster-whisper resample
+            samples = decode_audio(audio_path, sampling_rate=16000)
+        kwargs: Dict[str, Any] = {}
+        if ranges:
+            # The batched pipeline slices audio[start:end], so offsets are 16 kHz samples
+            kwargs["clip_timestamps"] = [{"start": int(s * 16000), "end": int(e * 16000)} for s, e in ranges]
+        segments, _info = pipeline.transcribe(
+            samples,
+            batch_size=int(os.getenv("FW_BATCH", "16")),
+            word_timestamps=False,
+            **kwargs,
+        )
+        return [
+            {"start": float(seg.start), "end": float(seg.end), "text": seg.text.strip()}
+            for seg in segments
+        ]
+
+    def _transcribe_chunks(
+        self, windows: Iterable[Tuple[float, float, np.ndarray]], sr: int, skip_silence: bool = False
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[float, float]]]:
+        """
+        Transcribe (start_s, end_s, samples) windows concurrently.
+        Returns (segments in window order, (start_s, end_s) of each failed chunk);
+        failed chunks are logged and left out of the segments.
+        With skip_silence (and ASR_VAD not 0), windows the VAD marks as silent are never sent.
+        """
+        # Scoped loop factory (not uvloop.install()) so Streamlit's own loop is untouched
+        with asyncio.Runner(loop_factory=_LOOP_FACTORY) as runner:
+            return runner.run(self._transcribe_chunks_async(windows, sr, skip_silence))
+
+    async def _transcribe_chunks_async(
+        self, windows: Iterable[Tuple[float, float, np.ndarray]], sr: int, skip_silence: bool
+    ) -> Tuple[List[Dict[str, Any]], List[Tuple[float, float]]]:
+        n_workers = max(1, int(os.getenv("ASR_CONCURRENCY", "20")))
+        # Bounded so WAV encoding overlaps uploads without buffering the whole file
+        queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+        results: Dict[int, Dict[str, Any]] = {}
+        failed: List[Tuple[float, float]] = []
+        skip_silence = skip_silence and os.getenv("ASR_VAD", "1") == "1"
+
+        async def producer():
+            try:
+                for idx, (start_s, end_s, chunk) in enumerate(windows):
+                    # The VAD pass is CPU-bound; keep it off the loop the uploads run on
+                    if skip_silence and not await asyncio.to_thread(is_speech, chunk, sr):
+                        print(f"[asr] chunk {start_s:.1f}-{end_s:.1f}s silent, skipped")
+                        continue
+                    await queue.put((idx, start_s, end_s, np_to_wav_bytes(chunk, sr)))
+            finally:
+                for _ in range(n_workers):
+                    await queue.put(None)
+
+        async def consumer(aclient: AsyncOpenAI):
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                idx, start_s, end_s, wav_bytes = item
+                try:
+                    results[idx] = await self._transcribe_bytes(aclient, wav_bytes, start_s, end_s)
+                except Exception as e:
+                    print(f"[asr] chunk {start_s:.1f}-{end_s:.1f}s failed: {e}")
+                    failed.append((start_s, end_s))
 
-    def _transcribe_bytes(self, wav_bytes: bytes) -> str:
+        # The async client's connection pool is bound to the running loop,
+        # so it only lives for this run.
+        async with AsyncOpenAI(api_key=self.api_key) as aclient:
+            await asyncio.gather(producer(), *(consumer(aclient) for _ in range(n_workers)))
+
+        return [seg for i in sorted(results) for seg in results[i]], sorted(failed)
+
+    async def _transcribe_bytes(
+        self, aclient: AsyncOpenAI, wav_bytes: bytes, start_s: float, end_s: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Transcribe one chunk. Returns absolute-time segments: the server's own
+        segment timestamps when the model provides them, else one chunk-wide segment.
+        """
         bio = io.BytesIO(wav_bytes)
         bio.name = "chunk.wav"
-        out = self.client.audio.transcriptions.create(
-            model="gpt-4o-mini-transcribe",
+        if self.model in _TIMESTAMP_MODELS:
+            out = await aclient.audio.transcriptions.create(
+                model=self.model,
+                file=bio,
+                response_format="verbose_json",
+                timestamp_granularities=["segment"],
+            )
+            return self._offset_segments(out, start_s, end_s)
+        out = await aclient.audio.transcriptions.create(
+            model=self.model,
             file=bio,
             response_format="text",
         )
-        return str(out).strip()
-
-    def _assign_speaker(self, seg: Dict[str, Any], turns: List[Dict[str, Any]]) -> str:
-        best = None
-        best_overlap = 0.0
-        for t in turns:
-            overlap = max(0.0, min(seg["end"], t["end"]) - max(seg["start"], t["start"]))
-            if overlap > best_overlap:
-                best_overlap = overlap
-                best = t
-        return best["speaker"] if best else "SPEAKER_00"
-
-    def _prepare_audio(self, file_path: str) -> str:
-        if file_path.lower().endswith(".wav"):
+        return [{"start": start_s, "end": end_s, "text": str(out).strip()}]
+
+    def _offset_segments(self, response: Any, start_s: float, end_s: float) -> List[Dict[str, Any]]:
+        segs: List[Dict[str, Any]] = []
+        for seg in getattr(response, "segments", None) or []:
+            if not isinstance(seg, dict):
+                seg = seg.model_dump()
+            text = (seg.get("text") or "").strip()
+            if not text:
+                continue
+            segs.append({
+                "start": start_s + float(seg["start"]),
+                "end": min(end_s, start_s + float(seg["end"])),
+                "text": text,
+            })
+        return segs
+
+    def _assign_speakers_vec(
+        self, segments: List[Dict[str, Any]], turns: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Same result as _assign_speakers_sweep, computed in NumPy over a banded
+        overlap matrix: each segment only gets columns for the turns that can
+        overlap it. Falls back to the sweep when the band is too wide.
+        """
+        ts, te, speakers = build_turn_index(turns)
+        segments = sorted(segments, key=lambda s: s["start"])
+        ss = np.fromiter((s["start"] for s in segments), dtype=np.float64, count=len(segments))
+        se = np.fromiter((s["end"] for s in segments), dtype=np.float64, count=len(segments))
+
+        # Candidate turns for segment i are [lo[i], hi[i]): turns at/after hi start
+        # at or after the segment's end, and every turn before lo ended by its
+        # start (the running max of ends is sorted, so searchsorted finds lo).
+        hi = np.searchsorted(ts, se, side="left")
+        lo = np.minimum(np.searchsorted(np.maximum.accumulate(te), ss, side="right"), hi)
+        width = int((hi - lo).max(initial=0))
+        if width == 0:
+            return [{**seg, "speaker": "SPEAKER_00"} for seg in segments]
+        if len(segments) * width > _VEC_ASSIGN_MAX_CELLS:
+            return self._assign_speakers_sweep(segments, turns)
+
+        cols = lo[:, None] + np.arange(width)
+        in_band = cols < hi[:, None]
+        cols = np.minimum(cols, len(ts) - 1)
+        ov = np.minimum(se[:, None], te[cols]) - np.maximum(ss[:, None], ts[cols])
+        ov[~in_band] = -np.inf
+        best = ov.argmax(axis=1)
+        best_overlap = ov[np.arange(len(segments)), best]
+        best = lo + best
+        return [
+            {**seg, "speaker": speakers[b] if o > 0 else "SPEAKER_00"}
+            for seg, b, o in zip(segments, best.tolist(), best_overlap.tolist())
+        ]
+
+    def _assign_speakers_sweep(
+        self, segments: List[Dict[str, Any]], turns: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Label each segment with the turn it overlaps most, in O(N + M).
+        Both lists are walked in start order; turns that ended before the
+        current segment starts are never revisited.
+        """
+        turns = sorted(turns, key=lambda t: t["start"])
+        n = len(turns)
+        j = 0
+        labeled: List[Dict[str, Any]] = []
+        for seg in sorted(segments, key=lambda s: s["start"]):
+            seg_start, seg_end = seg["start"], seg["end"]
+            while j < n and turns[j]["end"] <= seg_start:
+                j += 1
+            best = None
+            best_overlap = 0.0
+            k = j
+            while k < n and turns[k]["start"] < seg_end:
+                t = turns[k]
+                overlap = min(seg_end, t["end"]) - max(seg_start, t["start"])
+                if overlap > best_overlap:
+                    best_overlap = overlap
+                    best = t
+                k += 1
+            labeled.append({**seg, "speaker": best["speaker"] if best else "SPEAKER_00"})
+        return labeled
+
+    def _prepare_audio(self, file_path: Union[str, BinaryIO], temp_files: List[str]) -> str:
+        # WAVs are used as-is unless ASR_NORMALIZE=1 asks for the filter pass too
+        name = file_path if isinstance(file_path, str) else getattr(file_path, "name", "") or ""
+        skip_filters = name.lower().endswith(".wav") and os.getenv("ASR_NORMALIZE", "0") != "1"
+        if skip_filters and isinstance(file_path, str):
             return file_path
-        wav_path = extract_audio(file_path)
-        self.temp_files.append(wav_path)
+        # Uploaded WAVs are streams, so they still need writing out, just unfiltered
+        wav_path = extract_audio(file_path, filters=None) if skip_filters else extract_audio(file_path)
+        temp_files.append(wav_path)
         return wav_path
 
     def _create_sentence_segments(self, text: str, duration: float) -> List[Dict[str, Any]]:
@@ -150,14 +537,14 @@ class ASRProcessor:
         return segs
 
     def _split_sentences(self, text: str) -> List[str]:
-        parts = re.split(r"(?<=[.!?])\s+", text.strip())
-        return [p.strip() for p in parts if p.strip()]
+        # Parts of a whitespace split of stripped text carry no outer whitespace
+        return [p for p in _SENT_SPLIT_RE.split(text.strip()) if p]
 
-    def _cleanup_temp_files(self):
-        for p in self.temp_files:
+    def _cleanup_temp_files(self, temp_files: List[str]):
+        for p in temp_files:
             try:
                 if os.path.exists(p):
                     os.remove(p)
             except Exception:
                 pass
-        self.temp_files.clear()
+        temp_files.clear()
@@ -1,23 +1,36 @@
 import os
+import json
+import mmap
+import hashlib
 from pathlib import Path
 from typing import List, Dict, Optional
 
+import soundfile as sf
 import torch
 
-# Load .env explicitly (helps when Streamlit launches from a different CWD)
+_ROOT = Path(__file__).resolve().parents[1]
+
+# Load .env explicitly (helps when Streamlit launches from a different CWD);
+# shared with app.py, so the file is parsed once per process
 try:
-    from dotenv import load_dotenv
-    load_dotenv(dotenv_path=Path(__file__).resolve().parents[1] / ".env")
+    from config import load_env
+    load_env()
 except Exception:
     pass
 
 try:
     from pyannote.audio import Pipeline
-except Exception as e:
+except Exception:
     Pipeline = None  # handled in is_available()
 
 
+_MODEL_ID = "pyannote/speaker-diarization-3.1"
+_CACHE_DIR = _ROOT / "data" / "outputs" / ".diar_cache"
+# Least recently used entries beyond this are deleted after each write
+_CACHE_MAX_ENTRIES = int(os.getenv("DIAR_CACHE_MAX_ENTRIES", "200"))
+
 _PIPELINE = None
+_DEVICE = torch.device("cpu")
 
 
 def _get_token() -> Optional[str]:
@@ -38,11 +51,37 @@ def _get_token() -> Optional[str]:
     return token
 
 
+def _patch_resample_on_gpu(device: torch.device) -> None:
+    """
+    pyannote resamples on the CPU even when the models run on the GPU, which
+    leaves one core pegged while the GPU idles. Run the resample on `device`
+    and hand the result back on the caller's device.
+    """
+    from pyannote.audio.core.io import Audio
+
+    orig = Audio.downmix_and_resample
+    if getattr(orig, "_on_device", None) == device:
+        return
+
+    def _patched(self, waveform, sample_rate, *args, **kwargs):
+        # Newer pyannote passes extra arguments (e.g. channel=); forward them as-is
+        if self.sample_rate is None or sample_rate == self.sample_rate:
+            return orig(self, waveform, sample_rate, *args, **kwargs)
+        src = waveform.device
+        out = orig(self, waveform.to(device), sample_rate, *args, **kwargs)
+        if isinstance(out, tuple):
+            return (out[0].to(src),) + tuple(out[1:])
+        return out.to(src)
+
+    _patched._on_device = device
+    Audio.downmix_and_resample = _patched
+
+
 def _get_pipeline():
     """
     Lazily initialize the pyannote diarization pipeline.
     """
-    global _PIPELINE
+    global _PIPELINE, _DEVICE
     if _PIPELINE is not None:
         return _PIPELINE
 
@@ -56,28 +95,97 @@ def _get_pipeline():
         )
 
     pipe = Pipeline.from_pretrained(
-        "pyannote/speaker-diarization-3.1",
+        _MODEL_ID,
         use_auth_token=token,
     )
 
     if torch.cuda.is_available():
         try:
-            pipe.to(torch.device("cuda"))
+            device = torch.device("cuda")
+            pipe.to(device)
+            _patch_resample_on_gpu(device)
+            _DEVICE = device
         except Exception:
             # Fall back to CPU if device move fails
             pass
 
+    if _DEVICE.type == "cuda" and os.getenv("DIAR_FP16", "0") == "1":
+        # Segmentation CNN/LSTM is the hot path; the embedding model stays fully
+        # fp32 because its fbank front end is not stable in half precision.
+        seg = getattr(pipe, "_segmentation", None)
+        if seg is not None and hasattr(seg, "model"):
+            _autocast_forward(seg.model)
+
+    if _DEVICE.type == "cuda" and os.getenv("DIAR_WARMUP", "0") == "1":
+        # Pay CUDA init + cuDNN autotuning on a second of silence now rather
+        # than on the user's first upload; fixed-size chunks keep the tuning valid.
+        torch.backends.cudnn.benchmark = True
+        try:
+            pipe({"waveform": torch.zeros(1, 16000), "sample_rate": 16000})
+        except Exception:
+            pass
+
     _PIPELINE = pipe
     return _PIPELINE
 
 
+def _autocast_forward(model: torch.nn.Module) -> None:
+    """
+    Run `model`'s forward under fp16 autocast and return fp32 scores. Weights
+    stay fp32: SincNet's InstanceNorm1d rejects half weights with fp32 input.
+    """
+    orig = model.forward
+
+    def forward(*args, **kwargs):
+        with torch.autocast("cuda", dtype=torch.float16):
+            return orig(*args, **kwargs).float()
+
+    model.forward = forward
+
+
+def _cache_key(wav_path: str, pipeline) -> str:
+    """
+    BLAKE2b of the WAV bytes plus everything that changes the output: model id,
+    whether fp16 autocast is active, and the pipeline's instantiated parameters.
+    """
+    try:
+        params = pipeline.parameters(instantiated=True)
+    except Exception:
+        params = {}
+    settings = {
+        "model": _MODEL_ID,
+        "fp16": _DEVICE.type == "cuda" and os.getenv("DIAR_FP16", "0") == "1",
+        "params": params,
+    }
+    h = hashlib.blake2b(json.dumps(settings, sort_keys=True, default=str).encode(), digest_size=16)
+    with open(wav_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+    return h.hexdigest()
+
+
 def diarize(wav_path: str) -> List[Dict]:
     """
     Run diarization on a WAV path. Returns list of turns:
     [{ 'start': float, 'end': float, 'speaker': 'SPEAKER_00' }, ...]
+    Results are cached on disk by audio content and pipeline settings.
     """
     pipeline = _get_pipeline()
-    diar = pipeline(wav_path)
+    cache_path = _CACHE_DIR / f"{_cache_key(wav_path, pipeline)}.json"
+    if cache_path.exists():
+        try:
+            turns = json.loads(cache_path.read_text())
+            os.utime(cache_path)  # mark as recently used for _prune_cache()
+            return turns
+        except Exception:
+            pass  # unreadable entry; recompute and overwrite
+
+    # Decode once and hand pyannote an in-memory waveform (channel, time) instead
+    # of a path it re-reads for every chunk; models move their batches to the GPU.
+    data, sr = sf.read(wav_path, dtype="float32", always_2d=True)
+    waveform = torch.from_numpy(data.T.copy())
+    diar = pipeline({"waveform": waveform, "sample_rate": sr})
 
     turns: List[Dict] = []
     for turn, _, speaker in diar.itertracks(yield_label=True):
@@ -88,9 +196,26 @@ def diarize(wav_path: str) -> List[Dict]:
         })
 
     turns.sort(key=lambda x: x["start"])
+
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(turns, f)
+        os.replace(tmp, cache_path)
+        _prune_cache()
+    except OSError:
+        pass  # cache is best-effort
     return turns
 
 
+def _prune_cache() -> None:
+    """Keep only the _CACHE_MAX_ENTRIES most recently used cache entries."""
+    entries = sorted(_CACHE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in entries[_CACHE_MAX_ENTRIES:]:
+        path.unlink(missing_ok=True)
+
+
 def is_available() -> bool:
     """
     Quick availability check. Prints reason on failure.
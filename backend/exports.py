@@ -1,42 +1,121 @@
-from datetime import timedelta
-from typing import Any, Dict, List, Union
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 import io
+import os
 
-import srt
 from docx import Document
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
 
 
-TranscriptionInput = Union[Dict[str, Any], str]
+# Normalized segment: (start, end, speaker or "", stripped text)
+Cue = Tuple[float, float, str, str]
+
+TranscriptionInput = Union[Dict[str, Any], str, List[Cue]]
+
+EXPORT_FORMATS = ("srt", "vtt", "docx", "pdf")
+
+
+# Zero-padded fields by value, so timestamps are joined instead of formatted
+_PAD2 = [f"{i:02d}" for i in range(100)]
+_PAD3 = [f"{i:03d}" for i in range(1000)]
+
+
+def _fmt_ts(seconds: float, sep: str = ".") -> str:
+    """
+    "HH:MM:SS.mmm" (WebVTT) or, with sep=",", "HH:MM:SS,mmm" (SRT).
+    Rounds on total milliseconds so .9996 carries into the next second.
+    """
+    s, ms = divmod(int(round(seconds * 1000)), 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    hh = _PAD2[h] if h < 100 else str(h)
+    return hh + ":" + _PAD2[m] + ":" + _PAD2[s] + sep + _PAD3[ms]
+
+
+def _fmt_vtt_ts(seconds: float) -> str:
+    return _fmt_ts(seconds, ".")
+
+
+def _fmt_srt_ts(seconds: float) -> str:
+    return _fmt_ts(seconds, ",")
+
+
+def _normalize_segments(transcription_data: TranscriptionInput) -> Optional[List[Cue]]:
+    """
+    One pass over the segments: read timings, strip text, drop empties.
+    Returns the cue list (passed through if already normalized), or None for
+    plain-text input.
+    """
+    if isinstance(transcription_data, list):
+        return transcription_data
+    if not (isinstance(transcription_data, dict) and "segments" in transcription_data):
+        return None
+    cues: List[Cue] = []
+    for seg in transcription_data["segments"]:
+        text = (seg.get("text") or "").strip()
+        if not text:
+            continue
+        start = float(seg.get("start", 0.0))
+        end = float(seg.get("end", max(start + 0.5, start)))
+        cues.append((start, end, seg.get("speaker") or "", text))
+    return cues
+
+
+def _cue_content(speaker: str, text: str) -> str:
+    return f"{speaker}: {text}" if speaker else text
 
 
 def _compose_plain_text(transcription_data: TranscriptionInput) -> str:
     """
     Build a readable plain-text transcript from either:
-    - dict with "segments" (optional "speaker"), or
+    - dict with "segments" (optional "speaker") or normalized cues, or
     - raw string
     """
-    if isinstance(transcription_data, dict) and "segments" in transcription_data:
-        lines: List[str] = []
-        for seg in transcription_data["segments"]:
-            speaker = seg.get("speaker")
-            text = (seg.get("text") or "").strip()
-            if not text:
-                continue
-            if speaker:
-                lines.append(f"{speaker}: {text}")
-            else:
-                lines.append(text)
-        return "\n\n".join(lines)
+    cues = _normalize_segments(transcription_data)
+    if cues is not None:
+        return "\n\n".join([f"{speaker}: {text}" if speaker else text for _, _, speaker, text in cues])
     # fallback: string content
     return str(transcription_data)
 
 
 class ExportManager:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
+    def export_all(
+        self, transcription_data: TranscriptionInput, fmts: Sequence[str] = EXPORT_FORMATS
+    ) -> Dict[str, Union[str, bytes]]:
+        """
+        Render several formats from a single walk over the segments.
+        """
+        cues = _normalize_segments(transcription_data)
+        data = cues if cues is not None else transcription_data
+        return {fmt: getattr(self, f"to_{fmt}")(data) for fmt in fmts}
+
+    def export_bundle(
+        self,
+        transcription_data: TranscriptionInput,
+        fmts: Sequence[str] = EXPORT_FORMATS,
+        errors: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Union[str, bytes]]:
+        """
+        Like export_all, but renders the formats concurrently (threads, or
+        processes with EXPORT_PROCESSES=1). If `errors` is given, a failing
+        format is recorded there as a message instead of raising.
+        """
+        cues = _normalize_segments(transcription_data)
+        data = cues if cues is not None else transcription_data
+        pool = ProcessPoolExecutor if os.getenv("EXPORT_PROCESSES", "0") == "1" else ThreadPoolExecutor
+        with pool(max_workers=min(4, len(fmts)) or 1) as ex:
+            futures = {fmt: ex.submit(getattr(self, f"to_{fmt}"), data) for fmt in fmts}
+        outputs: Dict[str, Union[str, bytes]] = {}
+        for fmt, fut in futures.items():
+            try:
+                outputs[fmt] = fut.result()
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors[fmt] = str(e)
+        return outputs
 
     # ------------------------
     # Subtitles: SRT
@@ -44,30 +123,18 @@ class ExportManager:
     def to_srt(self, transcription_data: TranscriptionInput) -> str:
         """
         Convert transcription to SRT.
-        - If dict with segments: use real timings.
+        - If dict with segments (or cues): use real timings.
         - If plain text: fallback to naive 3s-per-sentence.
         """
-        if isinstance(transcription_data, dict) and "segments" in transcription_data:
-            subs: List[srt.Subtitle] = []
-            for i, seg in enumerate(transcription_data["segments"]):
-                start = float(seg.get("start", 0.0))
-                end = float(seg.get("end", max(start + 0.5, start)))
-                speaker = seg.get("speaker") or ""
-                text = (seg.get("text") or "").strip()
-                if not text:
-                    continue
-                content = f"{speaker}: {text}" if speaker else text
-                subs.append(
-                    srt.Subtitle(
-                        index=i + 1,
-                        start=timedelta(seconds=start),
-                        end=timedelta(seconds=end),
-                        content=content,
-                    )
-                )
-            return srt.compose(subs)
-        else:
+        cues = _normalize_segments(transcription_data)
+        if cues is None:
             return self._text_to_srt_fallback(str(transcription_data))
+        # Same ordering/numbering srt.compose applied: by time, indices from 1
+        ordered = sorted(cues, key=lambda c: (c[0], c[1]))
+        out: List[str] = []
+        for i, (start, end, speaker, text) in enumerate(ordered, 1):
+            out.append(f"{i}\n{_fmt_srt_ts(start)} --> {_fmt_srt_ts(end)}\n{_cue_content(speaker, text)}\n\n")
+        return "".join(out)
 
     # ------------------------
     # Subtitles: WebVTT
@@ -76,31 +143,15 @@ class ExportManager:
         """
         Convert transcription to WebVTT.
         """
-        def _fmt_vtt_ts(seconds: float) -> str:
-            # WebVTT allows hours, e.g. "00:01:02.345"
-            ms = int(round((seconds - int(seconds)) * 1000))
-            total = int(seconds)
-            h = total // 3600
-            m = (total % 3600) // 60
-            s = total % 60
-            return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
-
-        if isinstance(transcription_data, dict) and "segments" in transcription_data:
-            out = ["WEBVTT", ""]
-            for seg in transcription_data["segments"]:
-                start = float(seg.get("start", 0.0))
-                end = float(seg.get("end", max(start + 0.5, start)))
-                speaker = seg.get("speaker") or ""
-                text = (seg.get("text") or "").strip()
-                if not text:
-                    continue
-                content = f"{speaker}: {text}" if speaker else text
-                out.append(f"{_fmt_vtt_ts(start)} --> {_fmt_vtt_ts(end)}")
-                out.append(content)
-                out.append("")  # blank line
-            return "\n".join(out)
-        else:
+        cues = _normalize_segments(transcription_data)
+        if cues is None:
             return self._text_to_vtt_fallback(str(transcription_data))
+        out = ["WEBVTT", ""]
+        for start, end, speaker, text in cues:
+            out.append(f"{_fmt_vtt_ts(start)} --> {_fmt_vtt_ts(end)}")
+            out.append(_cue_content(speaker, text))
+            out.append("")  # blank line
+        return "\n".join(out)
 
     # ------------------------
     # Documents: DOCX
@@ -112,12 +163,9 @@ class ExportManager:
         doc = Document()
         doc.add_heading("Transcription", 0)
 
-        if isinstance(transcription_data, dict) and "segments" in transcription_data:
-            for seg in transcription_data["segments"]:
-                speaker = seg.get("speaker")
-                text = (seg.get("text") or "").strip()
-                if not text:
-                    continue
+        cues = _normalize_segments(transcription_data)
+        if cues is not None:
+            for _, _, speaker, text in cues:
                 if speaker:
                     p = doc.add_paragraph()
                     run = p.add_run(f"{speaker}: ")
@@ -139,26 +187,38 @@ class ExportManager:
     def to_pdf(self, transcription_data: TranscriptionInput) -> bytes:
         """
         Build a .pdf file (bytes) using reportlab.
+        Lines are wrapped and drawn straight onto the canvas; platypus layout
+        is far slower on long transcripts and chokes on "<" in the text.
         """
         content = _compose_plain_text(transcription_data)
 
         buf = io.BytesIO()
-        doc = SimpleDocTemplate(buf, pagesize=letter)
-        story: List[Any] = []
+        c = canvas.Canvas(buf, pagesize=letter)
+        width, height = letter
+        margin = 72
+        font, size, leading = "Helvetica", 10, 12
 
-        story.append(Paragraph("Transcription", self.styles["Title"]))
-        story.append(Spacer(1, 12))
+        y = height - margin
+        c.setFont("Helvetica-Bold", 18)
+        c.drawCentredString(width / 2, y - 18, "Transcription")
+        y -= 18 + 24
+        c.setFont(font, size)
 
         # Split content into paragraphs at blank lines for nicer layout
         for block in content.split("\n\n"):
             block = block.strip()
             if not block:
                 continue
-            story.append(Paragraph(block, self.styles["Normal"]))
-            story.append(Spacer(1, 8))
-
-        doc.build(story)
-        buf.seek(0)
+            for line in simpleSplit(block, font, size, width - 2 * margin):
+                if y < margin + leading:
+                    c.showPage()
+                    c.setFont(font, size)
+                    y = height - margin
+                y -= leading
+                c.drawString(margin, y, line)
+            y -= 8
+
+        c.save()
         return buf.getvalue()
 
     # ------------------------
@@ -169,23 +229,15 @@ class ExportManager:
         Naive SRT: split by '. ' and assign 3s per sentence.
         """
         parts = [p.strip() for p in text.split(". ") if p.strip()]
-        subs: List[srt.Subtitle] = []
+        out: List[str] = []
         for i, sentence in enumerate(parts):
-            start = timedelta(seconds=i * 3)
-            end = timedelta(seconds=(i + 1) * 3)
-            subs.append(srt.Subtitle(index=i + 1, start=start, end=end, content=sentence))
-        return srt.compose(subs)
+            out.append(f"{i + 1}\n{_fmt_srt_ts(i * 3)} --> {_fmt_srt_ts((i + 1) * 3)}\n{sentence}\n\n")
+        return "".join(out)
 
     def _text_to_vtt_fallback(self, text: str) -> str:
         """
         Naive VTT: split by '. ' and assign 3s per sentence.
         """
-        def _fmt_vtt_ts(seconds: int) -> str:
-            h = seconds // 3600
-            m = (seconds % 3600) // 60
-            s = seconds % 60
-            return f"{h:02d}:{m:02d}:{s:02d}.000"
-
         parts = [p.strip() for p in text.split(". ") if p.strip()]
         out = ["WEBVTT", ""]
         for i, sentence in enumerate(parts):
@@ -0,0 +1,37 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# Packed speaker turn: 18 bytes per turn instead of a three-key dict.
+# Speakers are interned; "spk" indexes into a separate labels list.
+TURN_DTYPE = np.dtype([("start", np.float64), ("end", np.float64), ("spk", np.int16)])
+
+
+def turns_to_array(turns: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, List[Any]]:
+    """
+    [{'start', 'end', 'speaker'}, ...] -> (TURN_DTYPE array, labels), in input order.
+    A missing speaker is interned as the label None.
+    """
+    index: Dict[Any, int] = {}
+    arr = np.empty(len(turns), dtype=TURN_DTYPE)
+    arr["start"] = np.fromiter((t["start"] for t in turns), dtype=np.float64, count=len(turns))
+    arr["end"] = np.fromiter((t["end"] for t in turns), dtype=np.float64, count=len(turns))
+    arr["spk"] = np.fromiter(
+        (index.setdefault(t.get("speaker"), len(index)) for t in turns),
+        dtype=np.int16, count=len(turns),
+    )
+    return arr, list(index)
+
+
+def build_turn_index(turns: List[Dict]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Start-sorted (starts, ends, speakers) arrays for aligning other timelines
+    against the turns with np.searchsorted instead of pairwise scans.
+    """
+    arr, labels = turns_to_array(turns)
+    arr = arr[np.argsort(arr["start"], kind="stable")]
+    return (
+        np.ascontiguousarray(arr["start"]),
+        np.ascontiguousarray(arr["end"]),
+        [labels[k] for k in arr["spk"].tolist()],
+    )
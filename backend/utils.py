@@ -1,13 +1,21 @@
 import os
-import io
+import sys
+import shutil
+import struct
+import hashlib
 import tempfile
 import subprocess
 from pathlib import Path
-from typing import Iterator, Tuple, Optional
+from typing import BinaryIO, Iterator, Tuple, Optional, Sequence, Union
 
+import numpy as np
+import soundfile as sf
 import yt_dlp
-import ffmpeg
-from pydub import AudioSegment
+
+
+# Single-pass cleanup applied while resampling: band-limit to speech,
+# denoise, and normalize loudness (EBU R128) before ASR.
+DEFAULT_AUDIO_FILTERS = "highpass=f=80,lowpass=f=7500,afftdn,loudnorm=I=-16:TP=-1.5:LRA=11"
 
 
 def setup_directories() -> None:
@@ -15,23 +23,57 @@ def setup_directories() -> None:
         Path(directory).mkdir(parents=True, exist_ok=True)
 
 
+def _fast_temp_dir(min_free_bytes: int = 1 << 30) -> Optional[str]:
+    """
+    RAM-backed /dev/shm on Linux when it has room, else None (system temp dir).
+    Container defaults can be as small as 64 MB, hence the free-space check.
+    """
+    if sys.platform.startswith("linux") and os.path.isdir("/dev/shm"):
+        try:
+            if shutil.disk_usage("/dev/shm").free >= min_free_bytes:
+                return "/dev/shm"
+        except OSError:
+            pass
+    return None
+
+
+_FFMPEG_PATH: Optional[str] = None
+_FFPROBE_PATH: Optional[str] = None
+_FFMPEG_CHECKED = False
+
+
 def check_ffmpeg() -> bool:
-    try:
-        result = subprocess.run(
-            ["ffmpeg", "-version"],
-            capture_output=True,
-            text=True,
-            timeout=5,
-        )
-        return result.returncode == 0
-    except (subprocess.TimeoutExpired, FileNotFoundError, subprocess.SubprocessError):
-        return False
+    """Resolve ffmpeg (and ffprobe) on PATH once per process; no subprocess spawn."""
+    global _FFMPEG_PATH, _FFPROBE_PATH, _FFMPEG_CHECKED
+    if not _FFMPEG_CHECKED:
+        _FFMPEG_PATH = shutil.which("ffmpeg")
+        _FFPROBE_PATH = shutil.which("ffprobe")
+        _FFMPEG_CHECKED = True
+    return _FFMPEG_PATH is not None
 
 
 def get_audio_duration(path: str) -> float:
     if not check_ffmpeg():
         return 60.0
+    if _FFPROBE_PATH:
+        # Ask for the one field we need as a bare value instead of full JSON
+        try:
+            r = subprocess.run(
+                [
+                    _FFPROBE_PATH, "-v", "error",
+                    "-show_entries", "format=duration",
+                    "-of", "default=nw=1:nk=1",
+                    path,
+                ],
+                capture_output=True,
+                text=True,
+                timeout=5,
+            )
+            return float(r.stdout.strip())
+        except (ValueError, subprocess.SubprocessError, OSError):
+            pass  # no/garbled duration: let ffmpeg.probe look at the streams
     try:
+        import ffmpeg  # ffmpeg-python, only for this fallback
         probe = ffmpeg.probe(path)
         dur: Optional[float] = None
         for s in probe.get("streams", []):
@@ -47,34 +89,99 @@ def get_audio_duration(path: str) -> float:
         return 60.0
 
 
-def extract_audio(input_path: str, sr: int = 16000, mono: bool = True) -> str:
+def extract_audio(
+    input_src: Union[str, BinaryIO],
+    sr: int = 16000,
+    mono: bool = True,
+    filters: Optional[str] = DEFAULT_AUDIO_FILTERS,
+) -> str:
+    """
+    Convert media to a mono 16k WAV temp file. input_src is a path or a readable
+    binary stream (e.g. a Streamlit upload), which is piped into ffmpeg directly.
+    filters is an ffmpeg -af chain run in the same pass (None to skip).
+    """
     if not check_ffmpeg():
         raise RuntimeError("FFmpeg not found. Please install FFmpeg to process media files.")
 
-    input_path = str(Path(input_path))
-    tmp_wav = Path(tempfile.gettempdir()) / f"audio_{next(tempfile._get_candidate_names())}.wav"
+    tmp_dir = _fast_temp_dir()
+    tmp_wav = Path(tmp_dir or tempfile.gettempdir()) / f"audio_{next(tempfile._get_candidate_names())}.wav"
 
     try:
-        (
-            ffmpeg
-            .input(input_path)
-            .output(str(tmp_wav), ac=1 if mono else 2, ar=sr, vn=None, f="wav")
-            .global_args("-y", "-hide_banner", "-loglevel", "error")
-            .run(capture_stdout=True, capture_stderr=True)
+        if isinstance(input_src, (str, os.PathLike)):
+            return _extract_audio_file(str(Path(input_src)), tmp_wav, sr, mono, filters)
+
+        if _extract_audio_stream(input_src, tmp_wav, sr, mono, filters):
+            return str(tmp_wav)
+
+        # Containers that need seeking (e.g. MP4 with a trailing moov atom) can't be
+        # decoded from a pipe: spool the stream to disk and retry from the file.
+        # Uploads can be up to 1 GB, so /dev/shm must fit the spool plus the WAV.
+        suffix = Path(getattr(input_src, "name", "") or "").suffix
+        size = input_src.seek(0, os.SEEK_END)
+        input_src.seek(0)
+        spool_dir = _fast_temp_dir(min_free_bytes=size + (1 << 30))
+        with tempfile.NamedTemporaryFile(dir=spool_dir, suffix=suffix, delete=False) as spool:
+            shutil.copyfileobj(input_src, spool, length=1 << 20)
+        try:
+            return _extract_audio_file(spool.name, tmp_wav, sr, mono, filters)
+        finally:
+            os.remove(spool.name)
+    except BaseException:
+        # Don't leave a partial WAV behind (in RAM, when it is in /dev/shm)
+        tmp_wav.unlink(missing_ok=True)
+        raise
+
+
+def _extract_audio_stream(stream: BinaryIO, tmp_wav: Path, sr: int, mono: bool, filters: Optional[str]) -> bool:
+    if hasattr(stream, "seek"):
+        stream.seek(0)
+    # stderr goes to a file, not a pipe: nobody reads it while stdin is being
+    # written, so a full pipe (lots of decode errors) would deadlock both sides
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(
+            _wav_argv("pipe:0", tmp_wav, sr, mono, filters),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=stderr,
         )
-        if not tmp_wav.exists() or tmp_wav.stat().st_size == 0:
-            raise RuntimeError("FFmpeg produced empty output.")
-        return str(tmp_wav)
-    except Exception:
-        # pydub fallback
-        audio = AudioSegment.from_file(input_path)
-        if mono:
-            audio = audio.set_channels(1)
-        audio = audio.set_frame_rate(sr)
-        audio.export(str(tmp_wav), format="wav")
-        if not tmp_wav.exists() or tmp_wav.stat().st_size == 0:
-            raise RuntimeError("pydub produced empty output.")
+        try:
+            shutil.copyfileobj(stream, proc.stdin, length=1 << 20)
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; the return code below says why
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        proc.wait()
+        stderr.seek(0)
+        err = stderr.read()
+    if proc.returncode != 0 or not tmp_wav.exists() or tmp_wav.stat().st_size == 0:
+        print(f"[utils] ffmpeg pipe decode failed: {err.decode(errors='replace').strip()}")
+        return False
+    return True
+
+
+def _wav_argv(input_arg: str, tmp_wav: Path, sr: int, mono: bool, filters: Optional[str]) -> list:
+    return [
+        _FFMPEG_PATH, "-y", "-hide_banner", "-loglevel", "error",
+        "-i", input_arg,
+        "-vn", *(["-af", filters] if filters else []),
+        "-ac", "1" if mono else "2", "-ar", str(sr), "-acodec", "pcm_s16le", "-f", "wav",
+        str(tmp_wav),
+    ]
+
+
+def _extract_audio_file(input_path: str, tmp_wav: Path, sr: int, mono: bool, filters: Optional[str]) -> str:
+    r = subprocess.run(_wav_argv(input_path, tmp_wav, sr, mono, filters), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if r.returncode == 0 and tmp_wav.exists() and tmp_wav.stat().st_size > 0:
         return str(tmp_wav)
+    if filters:
+        # Plain conversion (no filter chain), e.g. for builds missing afftdn/loudnorm
+        r = subprocess.run(_wav_argv(input_path, tmp_wav, sr, mono, None), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if r.returncode == 0 and tmp_wav.exists() and tmp_wav.stat().st_size > 0:
+            return str(tmp_wav)
+    raise RuntimeError(f"FFmpeg failed to extract audio: {r.stderr.decode(errors='replace').strip()}")
 
 
 def download_youtube_video(url: str, output_dir: str = "data/uploads") -> str:
@@ -100,10 +207,11 @@ def download_youtube_video(url: str, output_dir: str = "data/uploads") -> str:
         candidate = out_dir / f"{vid}.{ext}"
         if candidate.exists():
             return str(candidate)
-        matches = list(out_dir.glob(f"{vid}.*"))
-        if not matches:
+        # First match is enough; don't list every file in the uploads dir
+        match = next(out_dir.glob(f"{vid}.*"), None)
+        if match is None:
             raise RuntimeError("Downloaded file not found after yt-dlp run.")
-        return str(matches[0])
+        return str(match)
 
 
 def is_valid_file(file_path: str) -> bool:
@@ -113,30 +221,74 @@ def is_valid_file(file_path: str) -> bool:
     }
 
 
+def file_digest(src: Union[str, BinaryIO], digest_size: int = 16) -> str:
+    """
+    BLAKE2b hex digest of a file path or binary stream, read in 1 MB blocks.
+    A stream's position is restored afterwards.
+    """
+    h = hashlib.blake2b(digest_size=digest_size)
+    if isinstance(src, (str, os.PathLike)):
+        with open(src, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    else:
+        pos = src.tell()
+        src.seek(0)
+        for block in iter(lambda: src.read(1 << 20), b""):
+            h.update(block)
+        src.seek(pos)
+    return h.hexdigest()
+
+
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
 def get_file_size(file_path: str) -> str:
     size_bytes = os.path.getsize(file_path)
-    for unit in ["B", "KB", "MB", "GB"]:
-        if size_bytes < 1024.0:
-            return f"{size_bytes:.1f} {unit}"
-        size_bytes /= 1024.0
-    return f"{size_bytes:.1f} TB"
-
-
-def slice_audio(wav_path: str, window_s: float = 30.0, overlap_s: float = 0.3) -> Iterator[Tuple[float, float, bytes]]:
-    audio = AudioSegment.from_wav(wav_path)
-    total_ms = len(audio)
-    start_ms = 0
-    window_ms = int(window_s * 1000)
-    overlap_ms = int(overlap_s * 1000)
-
-    while start_ms < total_ms:
-        end_ms = min(start_ms + window_ms, total_ms)
-        clip = audio[start_ms:end_ms]
-        buf = io.BytesIO()
-        buf.name = "slice.wav"
-        clip.set_frame_rate(16000).set_channels(1).export(buf, format="wav")
-        buf.seek(0)
-        yield (start_ms / 1000.0, end_ms / 1000.0, buf.read())
-        if end_ms == total_ms:
+    # Each unit is 2**10 of the previous one, so the bit length picks it directly
+    idx = min(max(size_bytes.bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size_bytes / (1 << (idx * 10)):.1f} {_SIZE_UNITS[idx]}"
+
+
+def load_wav_np(wav_path: str) -> Tuple[np.ndarray, int]:
+    """Decode a WAV once into mono int16 samples."""
+    audio, sr = sf.read(wav_path, dtype="int16", always_2d=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1).astype(np.int16)
+    return audio, int(sr)
+
+
+def np_to_wav_bytes(samples: np.ndarray, sr: int) -> bytes:
+    """Wrap mono int16 samples in a WAV container (no resampling, no ffmpeg)."""
+    pcm = np.ascontiguousarray(samples, dtype="<i2").tobytes()
+    header = struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + len(pcm), b"WAVE",
+        b"fmt ", 16, 1, 1, sr, sr * 2, 2, 16,
+        b"data", len(pcm),
+    )
+    return header + pcm
+
+
+def slice_audio_np(
+    audio: np.ndarray, sr: int, window_s: float = 30.0, overlap_s: float = 0.3
+) -> Iterator[Tuple[float, float, np.ndarray]]:
+    """Yield (start_s, end_s, samples) windows as zero-copy views into an already decoded array."""
+    total = len(audio)
+    window = int(window_s * sr)
+    overlap = int(overlap_s * sr)
+    start = 0
+
+    while start < total:
+        end = min(start + window, total)
+        yield (start / sr, end / sr, audio[start:end])
+        if end == total:
             break
-        start_ms = end_ms - overlap_ms
+        start = end - overlap
+
+
+def slice_by_ranges(
+    audio: np.ndarray, sr: int, ranges: Sequence[Tuple[float, float]]
+) -> Iterator[Tuple[float, float, np.ndarray]]:
+    for start_s, end_s in ranges:
+        yield (float(start_s), float(end_s), audio[int(start_s * sr):int(end_s * sr)])
@@ -0,0 +1,98 @@
+import threading
+from typing import List, Tuple
+
+import numpy as np
+import torch
+
+try:
+    import webrtcvad
+except Exception:
+    webrtcvad = None  # optional fallback for is_speech()
+
+
+_MODEL = None
+_LOAD_ERROR = None  # first load failure, re-raised instead of retrying per call
+# Silero keeps recurrent state between frames; serialize callers of the shared model
+_LOCK = threading.Lock()
+
+
+def _get_model():
+    """
+    Lazily load Silero VAD from the silero-vad package. The model ships inside
+    the versioned wheel, so nothing is fetched or executed from GitHub.
+    """
+    global _MODEL, _LOAD_ERROR
+    if _MODEL is not None:
+        return _MODEL
+    if _LOAD_ERROR is not None:
+        raise _LOAD_ERROR
+
+    try:
+        from silero_vad import load_silero_vad
+
+        model = load_silero_vad()
+        model.eval()
+    except Exception as e:
+        _LOAD_ERROR = e
+        raise
+
+    _MODEL = model
+    return _MODEL
+
+
+def speech_ranges(samples: np.ndarray, sr: int = 16000) -> List[Tuple[float, float]]:
+    """
+    Return [(start_s, end_s), ...] of detected speech in mono int16 samples
+    (the array transcribe() already decoded; no second read of the file).
+    """
+    from silero_vad import get_speech_timestamps
+
+    model = _get_model()
+    wav = torch.from_numpy(samples.astype(np.float32) / 32768.0)
+    with _LOCK, torch.no_grad():
+        stamps = get_speech_timestamps(wav, model, sampling_rate=sr, return_seconds=True)
+    return [(float(t["start"]), float(t["end"])) for t in stamps]
+
+
+def is_speech(samples: np.ndarray, sr: int = 16000, threshold: float = 0.5) -> bool:
+    """
+    True if any frame of mono int16 samples looks like speech.
+    Uses Silero (512-sample frames) when loadable, else webrtcvad (30 ms frames);
+    with neither available it answers True so nothing is skipped.
+    """
+    if sr == 16000:
+        try:
+            model = _get_model()
+        except Exception:
+            model = None
+        if model is not None:
+            x = torch.from_numpy(samples.astype(np.float32) / 32768.0)
+            with _LOCK, torch.no_grad():
+                model.reset_states()
+                for i in range(0, len(x) - 511, 512):
+                    if model(x[i:i + 512], sr).item() > threshold:
+                        return True
+            return False
+
+    if webrtcvad is not None and sr in (8000, 16000, 32000, 48000):
+        vad = webrtcvad.Vad(2)
+        frame = sr * 30 // 1000
+        pcm = np.ascontiguousarray(samples, dtype=np.int16)
+        for i in range(0, len(pcm) - frame + 1, frame):
+            if vad.is_speech(pcm[i:i + frame].tobytes(), sr):
+                return True
+        return False
+
+    return True
+
+
+def is_available() -> bool:
+    """
+    Quick availability check. Prints reason on failure.
+    """
+    try:
+        _ = _get_model()
+        return True
+    except Exception as e:
+        print(f"[vad] not available: {e}")
+        return False
@@ -1,33 +1,83 @@
 import os
+import re
+import functools
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Base directory (project root, where .env lives)
+BASE_DIR = Path(__file__).resolve().parent
+
+
+_INLINE_COMMENT = re.compile(r"\s+#")
+
+
+def _parse_env_line(line: str):
+    """KEY=value, optional `export`, quotes, and ` # comment` after unquoted values."""
+    line = line.strip()
+    if not line or line.startswith("#") or "=" not in line:
+        return None
+    key, _, value = line.partition("=")
+    key = key.strip()
+    if key.startswith("export "):
+        key = key[len("export "):].strip()
+    value = value.strip()
+    if value[:1] in ("'", '"'):
+        end = value.find(value[0], 1)
+        value = value[1:end] if end != -1 else value[1:]
+    else:
+        value = _INLINE_COMMENT.split(value, 1)[0]
+    return (key, value) if key else None
+
+
+@functools.lru_cache(maxsize=None)
+def load_env() -> None:
+    """
+    Load .env from the project root once per process; later calls are free.
+    Variables already set in the environment win, as with python-dotenv.
+    """
+    try:
+        with open(BASE_DIR / ".env", encoding="utf-8-sig") as f:
+            for line in f:
+                parsed = _parse_env_line(line)
+                if parsed:
+                    os.environ.setdefault(*parsed)
+    except FileNotFoundError:
+        pass
+
+
+class _EnvSetting:
+    """Class attribute read from the environment on access, after load_env()."""
+
+    def __init__(self, name, default=None, cast=None):
+        self.name = name
+        self.default = default
+        self.cast = cast
+
+    def __get__(self, obj, owner):
+        load_env()
+        value = os.getenv(self.name, self.default)
+        return self.cast(value) if self.cast and value is not None else value
 
-# Base directory
-BASE_DIR = Path(__file__).parent.parent
 
 # Configuration
 class Config:
     # OpenAI
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    
+    OPENAI_API_KEY = _EnvSetting("OPENAI_API_KEY")
+
     # App settings
-    DEBUG = os.getenv("DEBUG", "False").lower() == "true"
-    MAX_FILE_SIZE = os.getenv("MAX_FILE_SIZE", "100MB")
-    
+    DEBUG = _EnvSetting("DEBUG", "False", cast=lambda v: v.lower() == "true")
+    MAX_FILE_SIZE = _EnvSetting("MAX_FILE_SIZE", "100MB")
+
     # File paths
     UPLOAD_DIR = BASE_DIR / "data" / "uploads"
     OUTPUT_DIR = BASE_DIR / "data" / "outputs"
     TEMP_DIR = BASE_DIR / "data" / "temp"
-    
+
     # Create directories if they don't exist
     @classmethod
     def create_directories(cls):
         for directory in [cls.UPLOAD_DIR, cls.OUTPUT_DIR, cls.TEMP_DIR]:
             directory.mkdir(parents=True, exist_ok=True)
-    
+
     @classmethod
     def validate_config(cls):
         """Validate required configuration"""
@@ -37,6 +87,3 @@ class Config:
                 "Please create a .env file with your OpenAI API key."
             )
         return True
-
-# Initialize directories
-Config.create_directories() 
\ No newline at end of file
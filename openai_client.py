@@ -0,0 +1,27 @@
+"""
+Shared OpenAI clients for the standalone scripts, so they reuse one
+connection pool (and TLS session) instead of each building their own.
+"""
+import importlib.util
+from functools import lru_cache
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+# HTTP/2 multiplexes requests over one connection, but needs the optional h2 package
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+@lru_cache(maxsize=1)
+def get_client() -> OpenAI:
+    return OpenAI(http_client=httpx.Client(http2=_HTTP2, limits=_LIMITS))
+
+
+@lru_cache(maxsize=1)
+def get_async_client() -> AsyncOpenAI:
+    """
+    The async pool belongs to the event loop that first uses it; call this from
+    within a single asyncio.run().
+    """
+    return AsyncOpenAI(http_client=httpx.AsyncClient(http2=_HTTP2, limits=_LIMITS))
@@ -0,0 +1,89 @@
+"""
+One process owns the GPU and a single pyannote pipeline; worker processes send
+it WAV paths over a local socket and get speaker turns back, instead of each
+loading its own copy of the models (and CUDA context) into VRAM.
+
+    python pipeline_server.py                  # start the server
+
+    from pipeline_server import remote_diarize
+    turns = remote_diarize("clip.wav")         # from any worker process
+"""
+import os
+import secrets
+import threading
+from multiprocessing.connection import Client, Listener
+
+from config import BASE_DIR, load_env
+
+load_env()
+
+ADDRESS = (os.getenv("DIAR_SERVER_HOST", "127.0.0.1"), int(os.getenv("DIAR_SERVER_PORT", "6010")))
+# Connections unpickle what they receive, so the key is the only thing keeping
+# other local users from running code in the server; there is no default.
+KEY_FILE = BASE_DIR / "data" / ".diar_server_key"
+
+
+def _authkey(create: bool = False) -> bytes:
+    """
+    DIAR_SERVER_KEY if set, else the key in KEY_FILE. With `create`, a random
+    key is written there (mode 0600) on first start.
+    """
+    key = os.getenv("DIAR_SERVER_KEY")
+    if key:
+        return key.encode()
+    if create and not KEY_FILE.exists():
+        KEY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    try:
+        return KEY_FILE.read_text().strip().encode()
+    except FileNotFoundError:
+        raise RuntimeError(
+            f"No diarization server key: set DIAR_SERVER_KEY or start the server to create {KEY_FILE}"
+        ) from None
+
+
+def _handle(conn, lock, diarize):
+    with conn:
+        while True:
+            try:
+                wav_path = conn.recv()
+            except EOFError:
+                return
+            try:
+                # One pipeline, one GPU: requests from all workers run in turn
+                with lock:
+                    turns = diarize(wav_path)
+                conn.send(("ok", turns))
+            except Exception as e:
+                conn.send(("error", str(e)))
+
+
+def serve():
+    from backend.diarization import diarize, is_available
+
+    # Load the pipeline before accepting work so the first request doesn't pay for it
+    if not is_available():
+        raise SystemExit(1)
+
+    lock = threading.Lock()
+    with Listener(ADDRESS, authkey=_authkey(create=True)) as listener:
+        print(f"✅ Diarization server listening on {ADDRESS[0]}:{ADDRESS[1]}")
+        while True:
+            conn = listener.accept()
+            threading.Thread(target=_handle, args=(conn, lock, diarize), daemon=True).start()
+
+
+def remote_diarize(wav_path: str):
+    """Diarize through the running server; same return value as backend.diarization.diarize."""
+    with Client(ADDRESS, authkey=_authkey()) as conn:
+        conn.send(os.path.abspath(wav_path))
+        status, payload = conn.recv()
+    if status != "ok":
+        raise RuntimeError(payload)
+    return payload
+
+
+if __name__ == "__main__":
+    serve()
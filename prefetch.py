@@ -0,0 +1,31 @@
+"""
+Download the pyannote models into the Hugging Face cache once, so later runs
+(test_gpu.py, the app's diarization) can load them with HF_HUB_OFFLINE=1 and
+skip the per-file network checks.
+"""
+import os
+
+from config import load_env
+
+load_env()
+
+# The 3.1 pipeline config pulls in the segmentation and embedding models
+REPOS = (
+    "pyannote/speaker-diarization-3.1",
+    "pyannote/segmentation-3.0",
+    "pyannote/wespeaker-voxceleb-resnet34-LM",
+)
+
+
+def main():
+    from huggingface_hub import snapshot_download
+
+    token = os.getenv("HUGGINGFACE_TOKEN") or os.getenv("HF_TOKEN")
+    for repo in REPOS:
+        path = snapshot_download(repo, token=token)
+        print(f"✅ {repo} -> {path}")
+    print("Set HF_HUB_OFFLINE=1 (e.g. in .env) to load these from the cache only.")
+
+
+if __name__ == "__main__":
+    main()
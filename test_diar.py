@@ -1,8 +1,8 @@
 import os
-from dotenv import load_dotenv
+from config import load_env
 
 # Load variables from .env file
-load_dotenv()
+load_env()
 
 token = os.getenv("HUGGINGFACE_TOKEN")
 assert token, "HUGGINGFACE_TOKEN not set"
@@ -1,23 +1,61 @@
-from openai import OpenAI, __version__
 import os
-from dotenv import load_dotenv
+import sys
+import asyncio
+from importlib.metadata import version as _pkg_version
+from config import load_env
 
 # Load environment variables
-load_dotenv()
-
-print("=== OpenAI SDK Test ===")
-print(f"openai sdk version: {__version__}")
-print(f"OPENAI_API_KEY set: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
-print(f"OPENAI_BASE_URL: {os.getenv('OPENAI_BASE_URL', 'Not set')}")
-
-# Test client connection
-try:
-    client = OpenAI()
-    models = client.models.list()
-    print(f"✅ Connection successful! Found {len(models.data)} models")
-    
-    # Test transcription endpoint
-    print("✅ OpenAI client initialized successfully")
-    
-except Exception as e:
-    print(f"❌ Error: {e}") 
\ No newline at end of file
+load_env()
+
+
+async def transcribe_many(client, paths, limit=8):
+    """
+    Transcribe several files concurrently (network-bound), at most `limit`
+    requests in flight. Returns the texts in input order.
+    """
+    sem = asyncio.Semaphore(limit)
+    model = os.getenv("ASR_MODEL", "gpt-4o-mini-transcribe")
+
+    async def one(path):
+        async with sem:
+            with open(path, "rb") as f:
+                resp = await client.audio.transcriptions.create(file=f, model=model)
+            return resp.text
+
+    return await asyncio.gather(*(one(p) for p in paths))
+
+
+async def _main():
+    print("=== OpenAI SDK Test ===")
+    print(f"openai sdk version: {_pkg_version('openai')}")
+    print(f"OPENAI_API_KEY set: {'Yes' if os.getenv('OPENAI_API_KEY') else 'No'}")
+    print(f"OPENAI_BASE_URL: {os.getenv('OPENAI_BASE_URL', 'Not set')}")
+
+    # Test client connection
+    try:
+        # The SDK import is the slow part; only pay for it once we need a client
+        from openai_client import get_async_client
+
+        client = get_async_client()
+        # Connectivity probe only: no retries, short timeout, and the raw HTTP
+        # response, so the model catalog is never parsed into objects
+        raw = await client.with_options(max_retries=0, timeout=5.0).models.with_raw_response.list(
+            extra_query={"limit": 1}
+        )
+        if raw.http_response.status_code != 200:
+            raise RuntimeError(f"/models returned HTTP {raw.http_response.status_code}")
+        print("✅ Connection successful!")
+
+        # Test transcription endpoint: python test_openai.py a.wav b.mp3 ...
+        if len(sys.argv) > 1:
+            texts = await transcribe_many(client, sys.argv[1:])
+            for path, text in zip(sys.argv[1:], texts):
+                print(f"✅ {path}: {text[:80]}")
+        print("✅ OpenAI client initialized successfully")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,66 @@
+"""
+Environment checks (HF token, OpenAI connectivity, pyannote on CUDA) as one
+pytest session: .env, the OpenAI client and the pipeline are each set up once.
+The standalone test_*.py scripts at the repo root remain for manual runs.
+"""
+import os
+
+import pytest
+
+from config import load_env
+
+
+@pytest.fixture(scope="session")
+def env():
+    load_env()
+    return os.environ
+
+
+@pytest.fixture(scope="session")
+def hf_token(env):
+    token = env.get("HUGGINGFACE_TOKEN")
+    if not token:
+        pytest.skip("HUGGINGFACE_TOKEN not set")
+    return token
+
+
+@pytest.fixture(scope="session")
+def openai_client(env):
+    if not env.get("OPENAI_API_KEY"):
+        pytest.skip("OPENAI_API_KEY not set")
+    pytest.importorskip("openai")
+    from openai_client import get_client
+
+    return get_client()
+
+
+@pytest.fixture(scope="session")
+def pipe(hf_token):
+    torch = pytest.importorskip("torch")
+    if not torch.cuda.is_available():
+        pytest.skip("CUDA not available")
+    Pipeline = pytest.importorskip("pyannote.audio").Pipeline
+
+    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=hf_token)
+    pipeline.to(torch.device("cuda"))
+    return pipeline
+
+
+def test_hf_token_loaded(hf_token):
+    assert len(hf_token) > 8
+
+
+def test_openai_connection(openai_client):
+    raw = openai_client.with_options(max_retries=0, timeout=5.0).models.with_raw_response.list(
+        extra_query={"limit": 1}
+    )
+    assert raw.http_response.status_code == 200
+
+
+def test_pipeline_on_gpu(pipe):
+    import torch
+
+    audio = {"waveform": torch.zeros(1, 16000), "sample_rate": 16000}
+    with torch.inference_mode():
+        pipe(audio)
+    assert pipe.device.type == "cuda"